@@ -31,13 +31,33 @@ Examples:
     $ python -m lds_org -e photo-url -m memberID individual
 """
 import os
+import sys
+import json
 import contextlib
 import logging
+import multiprocessing
 import pprint
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+try:
+    from concurrent import futures
+except ImportError:  # pragma: no cover
+    futures = None
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover
+    shared_memory = None
 
 __version__ = '0.2.1'
 CONFIG_URL = "https://tech.lds.org/mobile/ldstools/config.json"
+# Response bodies this size or larger reach worker processes through
+# shared memory instead of being pickled.
+SHARED_MEMORY_SIZE = 1 << 20
 ENV_USERNAME = 'LDSORG_USERNAME'
 ENV_PASSWORD = 'LDSORG_PASSWORD'
 
@@ -51,20 +71,131 @@ class Error(Exception):
 
 
 @contextlib.contextmanager
-def session(username=None, password=None):
+def session(username=None, password=None, transport=None):
     """Use LDSOrg as a context manager.
 
     Example:
     >>> with session() as lds:
     ...     rv = lds.get(....)
     """
-    lds = LDSOrg(username, password, signin=True)
+    lds = LDSOrg(username, password, signin=True, transport=transport)
     logger.debug(u"%x yielding start", id(lds.session))
     yield lds
     logger.debug(u"%x yielding stop", id(lds.session))
     lds.get('signout-url')
 
 
+class Transport(object):
+    """Base HTTP transport around a session or client.
+
+    Attributes not found on the transport are reflected to the session.
+
+    Args:
+        client: :class:`requests.Session` or :class:`httpx.Client`
+    """
+
+    def __init__(self, client):
+        self.session = client
+
+    def __getattr__(self, key):
+        """Reflect to the underlying session."""
+        if key == 'session':
+            raise AttributeError(key)
+        return getattr(self.session, key)
+
+    def get(self, url, **kwargs):
+        """GET url using the session."""
+        return self.session.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """POST url using the session."""
+        return self.session.post(url, **kwargs)
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+
+class RequestsTransport(Transport):
+    """HTTP transport using :class:`requests.Session`.
+
+    The session is mounted with an HTTPAdapter sized for fanning out
+    across many units on the same host.  Connections are kept alive and
+    reused from the pool.  Set pool_maxsize to at least the number of
+    threads making requests, or connections beyond the pool are opened
+    and then discarded.
+
+    Args:
+        pool_connections (int): number of host pools to cache
+        pool_maxsize (int): maximum connections kept per host
+        max_retries (int): retries for failed connections
+        timeout (float or tuple): default timeout for each request
+        pool_block (bool): wait for a free connection instead of opening
+            more than pool_maxsize connections to a host
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, max_retries=0,
+                 timeout=None, pool_block=False):
+        super(RequestsTransport, self).__init__(requests.Session())
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize,
+                              max_retries=max_retries,
+                              pool_block=pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, url, **kwargs):
+        """GET url using the default timeout unless given."""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """POST url using the default timeout unless given."""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.post(url, **kwargs)
+
+
+class HTTPXTransport(Transport):
+    """HTTP transport using :class:`httpx.Client`.
+
+    Supports HTTP/2, multiplexing many requests over a single connection
+    to each host, and transparently decodes gzip/deflate (and brotli when
+    installed) responses.  Requires the optional 'httpx[http2]' package.
+    The client applies the default timeout.
+
+    HTTP/2 is negotiated over TLS, as with LDS.org.  Plain 'http://' URLs
+    stay on HTTP/1.1 unless http1 is False, which speaks HTTP/2 to them
+    with prior knowledge.
+
+    Args:
+        http2 (bool): negotiate HTTP/2 when the server supports it
+        http1 (bool): allow HTTP/1.1, False to only use HTTP/2
+        max_connections (int): maximum open connections
+        max_keepalive_connections (int): maximum idle connections kept
+        keepalive_expiry (float): seconds before an idle connection closes
+        timeout (float): default timeout for each request
+    """
+
+    def __init__(self, http2=True, max_connections=100,
+                 max_keepalive_connections=20, keepalive_expiry=5.0,
+                 timeout=None, http1=True):
+        if httpx is None:
+            raise Error("HTTPXTransport requires 'httpx[http2]'")
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry)
+        try:
+            client = httpx.Client(http1=http1, http2=http2, limits=limits,
+                                  timeout=timeout, follow_redirects=True)
+        except ImportError:
+            # httpx without the 'h2' package for HTTP/2
+            raise Error("HTTPXTransport requires 'httpx[http2]'")
+        super(HTTPXTransport, self).__init__(client)
+
+
 class LDSOrg(object):
     """Access LDS.org JSON web tools.
 
@@ -73,7 +204,7 @@ class LDSOrg(object):
     """
 
     def __init__(self, username=None, password=None, signin=False,
-                 url=None):
+                 url=None, transport=None):
         """Get endpoints and possibly signin.
 
         Args:
@@ -82,8 +213,13 @@ class LDSOrg(object):
             signin (bool): Sign in using environment variables when not
                 supplying the username and password
             url (str): override the current signin URL when it changes
+            transport: :class:`RequestsTransport` or :class:`HTTPXTransport`,
+                defaults to :class:`RequestsTransport`
         """
-        self.session = requests.Session()
+        if transport is None:
+            transport = RequestsTransport()
+        self.transport = transport
+        self.session = transport.session
         self.unit_number = ''
 
         self._get_endpoints()
@@ -101,7 +237,7 @@ class LDSOrg(object):
         return self.endpoints[key]
 
     def __getattr__(self, key):
-        """Reflect to requests.Session for any needs.
+        """Reflect to the transport session for any needs.
 
         Now we can use the class instance just as we would a session.
         """
@@ -135,8 +271,8 @@ class LDSOrg(object):
         if url is None:
             url = self['auth-url']
         self._debug(u'SIGNIN %s %s', username, url)
-        rv = self.session.post(url, data={'username': username,
-                                          'password': password})
+        rv = self.transport.post(url, data={'username': username,
+                                            'password': password})
         if 'etag' not in rv.headers:
             raise Error('Username/password failed')
         self._debug(u'SIGNIN success!')
@@ -170,12 +306,12 @@ class LDSOrg(object):
         Args:
             endpoint (str): endpoint or URL
             args (tuple): substituation for any '{}' in the endpoint
-            kwargs (dict): unit, paramaters for :meth:`requests.Session.get`
+            kwargs (dict): unit, paramaters for the transport session get
                 unit: unit number
                 member: member number
 
         Returns:
-            :class:`requests.Response`
+            :class:`requests.Response` or :class:`httpx.Response`
 
         Exceptions:
             Error for unknown endpoint
@@ -219,17 +355,143 @@ class LDSOrg(object):
             raise
 
         self._debug('GET %s', url)
-        rv = self.session.get(url, **kwargs)
+        rv = self.transport.get(url, **kwargs)
         self._debug('Request Headers %s',
                     pprint.pformat(dict(rv.request.headers)))
         try:
             length = len(rv.raw)
-        except TypeError:
+        except (TypeError, AttributeError):
             length = 0
         self._debug(u'response=%s length=%d', str(rv), length)
         self._debug('Response Headers %s', pprint.pformat(dict(rv.headers)))
         return rv
 
+    def get_units(self, endpoint, units, *args, **kwargs):
+        """Get endpoint for each unit, optionally decoding in processes.
+
+        Requests are made concurrently through the transport.  Without a
+        transform, the responses are returned.  With a transform, each
+        JSON body is decoded and given to the transform in a process pool
+        so large stakes use all cores.  Bodies of SHARED_MEMORY_SIZE or
+        more are handed to the workers through shared memory.
+
+        Args:
+            endpoint (str): endpoint or URL
+            units (iterable): unit numbers
+            args (tuple): substituation for any '{}' in the endpoint
+            kwargs (dict): paramaters for :meth:`get` and
+                transform: picklable function given the decoded JSON
+                processes: worker processes, None for cpu count and 0 to
+                    transform in this process
+                executor: :class:`concurrent.futures.ProcessPoolExecutor`
+                    to reuse across calls instead of starting one each
+                    call.  Create it with the 'spawn' context; it is not
+                    shut down.
+                threads: concurrent requests, defaults to the transport
+                    pool_maxsize, or 8.  More threads than pooled
+                    connections open and discard extra connections.
+
+        Returns:
+            list of responses, or transform results, in order of units
+
+        Exceptions:
+            Error for a unit not returning 200 when transforming
+        """
+        transform = kwargs.pop('transform', None)
+        processes = kwargs.pop('processes', None)
+        executor = kwargs.pop('executor', None)
+        threads = kwargs.pop('threads',
+                             getattr(self.transport, 'pool_maxsize', 8))
+        if futures is None:
+            raise Error("get_units requires concurrent.futures")
+        units = list(units)
+        self._debug(u'GET %s for %d units', endpoint, len(units))
+
+        def fetch(unit):
+            rv = self.get(endpoint, unit=unit, *args, **kwargs)
+            if transform is None:
+                return rv
+            return self._body(rv, unit)
+
+        with futures.ThreadPoolExecutor(threads) as pool:
+            fetching = dict((pool.submit(fetch, unit), n)
+                            for n, unit in enumerate(units))
+            if transform is None:
+                return [f.result() for f in
+                        sorted(fetching, key=fetching.get)]
+            if processes == 0:
+                return [_transform_body(f.result(), transform) for f in
+                        sorted(fetching, key=fetching.get)]
+            context = _spawn_context()
+            if context is not None:
+                workers = executor or futures.ProcessPoolExecutor(
+                    processes, mp_context=context)
+                return self._transform_units(fetching, transform, workers,
+                                             shutdown=executor is None)
+        # Forking while fetch threads hold locks may deadlock, so finish
+        # fetching before starting the workers.
+        workers = executor or futures.ProcessPoolExecutor(processes)
+        return self._transform_units(fetching, transform, workers,
+                                     shutdown=executor is None)
+
+    def _transform_units(self, fetching, transform, workers, shutdown=False):
+        """Transform bodies in a process pool as they are fetched.
+
+        Each shared memory segment is unlinked as soon as its body is
+        transformed, and bodies are dropped once handed to the pool.
+
+        Args:
+            fetching (dict): futures of response bodies to their index
+            transform: picklable function given the decoded JSON
+            workers: :class:`concurrent.futures.ProcessPoolExecutor`
+            shutdown (bool): shut down workers when done
+        """
+        results = [None] * len(fetching)
+        shared = dict()
+        decoding = dict()
+
+        def release(name):
+            shm = shared.pop(name, None)
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+        try:
+            for f in futures.as_completed(fetching):
+                n = fetching.pop(f)
+                body = f.result()
+                name = None
+                if shared_memory and len(body) >= SHARED_MEMORY_SIZE:
+                    shm = shared_memory.SharedMemory(
+                        create=True, size=len(body))
+                    shm.buf[:len(body)] = body
+                    name = shm.name
+                    shared[name] = shm
+                    body = (name, len(body))
+                decoded = workers.submit(_transform_body, body, transform)
+                if name is not None:
+                    decoded.add_done_callback(
+                        lambda _, name=name: release(name))
+                decoding[decoded] = n
+                del f, body
+            for f in futures.as_completed(decoding):
+                results[decoding[f]] = f.result()
+        finally:
+            # Segments must outlive the decodes still reading them
+            futures.wait(decoding)
+            for name in list(shared):
+                release(name)
+            if shutdown:
+                workers.shutdown()
+        return results
+
+    def _body(self, rv, unit):
+        """Get response body bytes, raising Error unless successful."""
+        if rv.status_code != 200:
+            self._error(u'unit %s response=%s', unit, str(rv))
+            raise Error("Unit request failed", unit, rv.status_code)
+        return rv.content
+
     def _debug(self, msg, *args):
         """Wrap logging with session number."""
         return logger.debug(u'%x ' + msg, id(self.session), *args)
@@ -245,7 +507,7 @@ class LDSOrg(object):
         """
         # Get the endpoints
         self._debug(u"Get endpoints")
-        rv = self.session.get(CONFIG_URL)
+        rv = self.transport.get(CONFIG_URL)
         assert rv.status_code == 200
         self.endpoints = rv.json()
         self._debug(u'Got %d endponts', len(self.endpoints))
@@ -271,6 +533,37 @@ class LDSOrg(object):
                     v = ep[k] = v.replace(pattern, '{}')
 
 
+def _spawn_context():
+    """Get the 'spawn' multiprocessing context, or None when unsupported.
+
+    ProcessPoolExecutor only accepts a context from Python 3.7.
+    """
+    if sys.version_info < (3, 7):
+        return None
+    return multiprocessing.get_context('spawn')
+
+
+def _transform_body(body, transform):
+    """Decode JSON body and transform it, run in a worker process.
+
+    Args:
+        body (bytes or tuple): response body or (name, size) of the
+            shared memory holding it
+        transform: function given the decoded JSON
+    """
+    if isinstance(body, tuple):
+        name, size = body
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            with shm.buf[:size] as view:
+                data = json.loads(str(view, 'utf-8'))
+        finally:
+            shm.close()
+    else:
+        data = json.loads(body.decode('utf-8'))
+    return transform(data)
+
+
 class DataAdapter(object):
     """Adapts dict JSON data provided by LDS.org.
 
@@ -288,10 +581,8 @@ class DataAdapter(object):
 
 
 if __name__ == "__main__":  # pragma: no cover
-    import sys
     import argparse
     import getpass
-    import json
 
     def main():
         """Remove module execution variables from globals."""
@@ -41,8 +41,8 @@ setup(
     zip_safe=False,
     include_package_data=True,
     install_requires=requirements,
-    # Install these with "pip install -e '.[paging]'" or '.[docs]'
-    # extras_require={
-    #     'docs': 'sphinx',
-    # }
+    # Install these with "pip install -e '.[http2]'"
+    extras_require={
+        'http2': 'httpx[http2]',
+    }
 )
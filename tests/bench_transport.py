@@ -0,0 +1,214 @@
+"""Compare HTTP transports against a local stand-in server.
+
+The server answers every GET with a JSON payload shaped like a unit
+membership list, gzip compressed when the client asks for it.  Requests
+are fanned out over a thread pool, as when pulling many units at once.
+
+There are two servers.  One speaks HTTP/1.1 and measures pooling,
+keep-alive and compression.  When the 'h2' package is installed, the
+other speaks cleartext HTTP/2 with prior knowledge (h2c), so
+HTTPXTransport(http1=False) multiplexes every request over one connection.
+
+    $ python tests/bench_transport.py -n 500 -w 16
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import threading
+from io import BytesIO
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import BaseRequestHandler, TCPServer, ThreadingMixIn
+except ImportError:  # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import BaseRequestHandler, TCPServer, ThreadingMixIn
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import lds_org
+
+PAYLOAD = json.dumps([{'householdName': 'Family %d' % n,
+                       'headOfHouseIndividualId': n,
+                       'phone': '555-%04d' % n}
+                      for n in range(300)]).encode('utf-8')
+
+
+def _compress(data):
+    buf = BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+        f.write(data)
+    return buf.getvalue()
+
+
+PAYLOAD_GZIP = _compress(PAYLOAD)
+
+
+def response(path, accept_encoding):
+    """Return (status, headers, body) for a GET of path."""
+    if path.endswith('/missing'):
+        return 404, [('content-length', '0')], b''
+    headers = [('content-type', 'application/json')]
+    body = PAYLOAD
+    if 'gzip' in accept_encoding:
+        body = PAYLOAD_GZIP
+        headers.append(('content-encoding', 'gzip'))
+    headers.append(('content-length', str(len(body))))
+    return 200, headers, body
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """Handle each request in a thread."""
+
+    daemon_threads = True
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serve PAYLOAD over keep-alive connections, 404 for '/missing'."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        status, headers, body = response(
+            self.path, self.headers.get('Accept-Encoding', ''))
+        self.send_response(status)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class H2Server(ThreadingMixIn, TCPServer):
+    """Handle each HTTP/2 connection in a thread, counting connections."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+    connections = 0
+
+
+class H2Handler(BaseRequestHandler):
+    """Serve the same responses as Handler over cleartext HTTP/2."""
+
+    def handle(self):
+        import h2.config
+        import h2.connection
+        import h2.events
+        self.server.connections += 1
+        config = h2.config.H2Configuration(client_side=False,
+                                           header_encoding='utf-8')
+        conn = h2.connection.H2Connection(config=config)
+        conn.initiate_connection()
+        self.request.sendall(conn.data_to_send())
+        pending = dict()
+        while True:
+            data = self.request.recv(65535)
+            if not data:
+                return
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    headers = dict(event.headers)
+                    status, out, body = response(
+                        headers[':path'], headers.get('accept-encoding', ''))
+                    conn.send_headers(event.stream_id,
+                                      [(':status', str(status))] + out,
+                                      end_stream=not body)
+                    if body:
+                        pending[event.stream_id] = body
+                elif isinstance(event, h2.events.StreamReset):
+                    pending.pop(event.stream_id, None)
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    return
+            self._send_pending(conn, pending)
+            self.request.sendall(conn.data_to_send())
+
+    @staticmethod
+    def _send_pending(conn, pending):
+        """Send as much of each body as flow control allows."""
+        for stream_id, body in list(pending.items()):
+            while body:
+                size = min(conn.local_flow_control_window(stream_id),
+                           conn.max_outbound_frame_size, len(body))
+                if size <= 0:
+                    break
+                conn.send_data(stream_id, body[:size])
+                body = body[size:]
+            if body:
+                pending[stream_id] = body
+            else:
+                conn.end_stream(stream_id)
+                del pending[stream_id]
+
+
+def serve(http2=False):
+    """Start a stand-in server in a thread, returning (server, url).
+
+    Args:
+        http2 (bool): serve cleartext HTTP/2 instead of HTTP/1.1
+    """
+    if http2:
+        server = H2Server(('127.0.0.1', 0), H2Handler)
+    else:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, 'http://127.0.0.1:%d/' % server.server_address[1]
+
+
+def bench(transport, url, requests, workers):
+    """Return seconds to GET url requests times over workers threads."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def fetch(_):
+        rv = transport.get(url)
+        assert rv.status_code == 200
+        return len(rv.json())
+
+    start = time.time()
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(fetch, range(requests)))
+    return time.time() - start
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=500, help='Number of requests')
+    parser.add_argument('-w', type=int, default=16, help='Worker threads')
+    args = parser.parse_args()
+
+    servers = [serve()]
+    transports = [
+        ('requests (default pool)', servers[0],
+         lambda: lds_org.RequestsTransport()),
+        ('requests (pool %d)' % args.w, servers[0],
+         lambda: lds_org.RequestsTransport(pool_maxsize=args.w)),
+    ]
+    if lds_org.httpx is not None:
+        transports.append(('httpx HTTP/1.1', servers[0],
+                           lambda: lds_org.HTTPXTransport()))
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            pass
+        else:
+            servers.append(serve(http2=True))
+            transports.append(('httpx HTTP/2 (h2c)', servers[-1],
+                               lambda: lds_org.HTTPXTransport(http1=False)))
+    for name, (server, url), make in transports:
+        transport = make()
+        try:
+            seconds = bench(transport, url, args.n, args.w)
+        finally:
+            transport.close()
+        print("{:25s} {:8.3f}s {:8.1f} req/s".format(
+            name, seconds, args.n / seconds))
+    for server, url in servers:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import pytest
+import lds_org
+from tests.bench_transport import serve, PAYLOAD
+
+
+@pytest.fixture(scope='module')
+def url():
+    server, url = serve()
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def h2server():
+    pytest.importorskip('httpx')
+    pytest.importorskip('h2')
+    server, url = serve(http2=True)
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_timeout(monkeypatch):
+    transport = lds_org.RequestsTransport(timeout=7)
+    calls = []
+    monkeypatch.setattr(transport.session, 'get',
+                        lambda url, **kwargs: calls.append(kwargs))
+    transport.get('http://example.com')
+    transport.get('http://example.com', timeout=2)
+    assert [_['timeout'] for _ in calls] == [7, 2]
+    # passthrough to the session
+    assert transport.headers is transport.session.headers
+    transport.close()
+
+
+@pytest.mark.parametrize('pool_block', [False, True])
+def test_requests_pool_block(url, caplog, pool_block):
+    from concurrent.futures import ThreadPoolExecutor
+    transport = lds_org.RequestsTransport(pool_maxsize=2,
+                                          pool_block=pool_block)
+    with ThreadPoolExecutor(8) as pool:
+        rv = list(pool.map(transport.get, [url] * 32))
+    transport.close()
+    assert [_.status_code for _ in rv] == [200] * 32
+    discarded = [_ for _ in caplog.records
+                 if 'Connection pool is full' in _.getMessage()]
+    assert bool(discarded) is not pool_block
+
+
+def test_requests_get(url):
+    transport = lds_org.RequestsTransport(timeout=5)
+    rv = transport.get(url)
+    assert rv.status_code == 200
+    assert rv.headers['content-encoding'] == 'gzip'
+    assert rv.content == PAYLOAD
+    transport.close()
+
+
+def test_httpx_get(url):
+    pytest.importorskip('httpx')
+    pytest.importorskip('h2')
+    transport = lds_org.HTTPXTransport(timeout=5)
+    rv = transport.get(url)
+    assert rv.status_code == 200
+    assert rv.headers['content-encoding'] == 'gzip'
+    assert rv.content == PAYLOAD
+    assert transport.headers is transport.session.headers
+    transport.close()
+
+
+def test_httpx_missing_h2(monkeypatch):
+    httpx = pytest.importorskip('httpx')
+
+    def client(**kwargs):
+        raise ImportError("Using http2=True, but the 'h2' package is not installed.")
+    monkeypatch.setattr(httpx, 'Client', client)
+    with pytest.raises(lds_org.Error):
+        lds_org.HTTPXTransport()
+
+
+def test_httpx_http2(h2server):
+    from concurrent.futures import ThreadPoolExecutor
+    server, url = h2server
+    transport = lds_org.HTTPXTransport(http1=False, timeout=5)
+    with ThreadPoolExecutor(8) as pool:
+        rv = list(pool.map(transport.get, [url] * 16))
+    transport.close()
+    assert set(_.http_version for _ in rv) == set(['HTTP/2'])
+    assert rv[0].headers['content-encoding'] == 'gzip'
+    assert rv[0].content == PAYLOAD
+    # multiplexed over a single connection
+    assert server.connections == 1
@@ -0,0 +1,128 @@
+import threading
+import pytest
+import lds_org
+from tests.bench_transport import serve, PAYLOAD
+
+pytest.importorskip('concurrent.futures')
+
+
+def households(data):
+    return len(data)
+
+
+@pytest.fixture(scope='module')
+def lds():
+    server, url = serve()
+
+    class LocalOrg(lds_org.LDSOrg):
+        def _get_endpoints(self):
+            self.endpoints = {'auth-url': url,
+                              'unit-membership': url + 'unit/{unit}'}
+
+    lds = LocalOrg()
+    yield lds
+    lds.transport.close()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def segments(monkeypatch):
+    """Record shared memory segments created and unlinked."""
+    if lds_org.shared_memory is None:
+        pytest.skip('multiprocessing.shared_memory is not available')
+    created, unlinked = [], []
+
+    class SharedMemory(lds_org.shared_memory.SharedMemory):
+        def __init__(self, *args, **kwargs):
+            super(SharedMemory, self).__init__(*args, **kwargs)
+            created.append(self.name)
+
+        def unlink(self):
+            super(SharedMemory, self).unlink()
+            unlinked.append(self.name)
+
+    monkeypatch.setattr(lds_org.shared_memory, 'SharedMemory', SharedMemory)
+    monkeypatch.setattr(lds_org, 'SHARED_MEMORY_SIZE', 1)
+    return created, unlinked
+
+
+def test_get_units(lds):
+    rv = lds.get_units('unit-membership', [1, 2, 3])
+    assert [_.status_code for _ in rv] == [200] * 3
+    assert rv[0].content == PAYLOAD
+
+
+def test_get_units_threads(lds, monkeypatch):
+    threads = []
+
+    class ThreadPoolExecutor(lds_org.futures.ThreadPoolExecutor):
+        def __init__(self, max_workers, *args, **kwargs):
+            threads.append(max_workers)
+            super(ThreadPoolExecutor, self).__init__(max_workers,
+                                                     *args, **kwargs)
+
+    monkeypatch.setattr(lds_org.futures, 'ThreadPoolExecutor',
+                        ThreadPoolExecutor)
+    monkeypatch.setattr(lds.transport, 'pool_maxsize', 3)
+    lds.get_units('unit-membership', [1])
+    lds.get_units('unit-membership', [1], threads=2)
+    assert threads == [3, 2]
+
+
+@pytest.mark.parametrize('processes', [0, 2])
+def test_get_units_transform(lds, processes):
+    rv = lds.get_units('unit-membership', range(5), transform=households,
+                       processes=processes)
+    assert rv == [300] * 5
+
+
+def test_get_units_executor(lds):
+    context = lds_org._spawn_context()
+    kwargs = dict(mp_context=context) if context else dict()
+    with lds_org.futures.ProcessPoolExecutor(2, **kwargs) as executor:
+        for units in (range(3), range(4)):
+            rv = lds.get_units('unit-membership', units,
+                               transform=households, executor=executor)
+            assert rv == [300] * len(units)
+        # still usable, not shut down by get_units
+        assert executor.submit(households, [1]).result() == 1
+
+
+def test_get_units_shared_memory(lds, segments):
+    created, unlinked = segments
+    rv = lds.get_units('unit-membership', range(3), transform=households,
+                       processes=2)
+    assert rv == [300] * 3
+    assert len(created) == 3
+    assert sorted(unlinked) == sorted(created)
+
+
+def test_get_units_failed(lds, segments):
+    created, unlinked = segments
+    with pytest.raises(lds_org.Error) as err:
+        lds.get_units('unit-membership', [1, 2, 'missing', 3, 4],
+                      transform=households, processes=2)
+    assert err.value.args == ("Unit request failed", 'missing', 404)
+    assert sorted(unlinked) == sorted(created)
+
+
+@pytest.mark.filterwarnings('ignore:This process .* is multi-threaded')
+def test_get_units_without_spawn(lds, monkeypatch):
+    fetching = []
+
+    class ProcessPoolExecutor(lds_org.futures.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            assert 'mp_context' not in kwargs
+            fetching.extend(_ for _ in threading.enumerate()
+                            if _.name.startswith('ThreadPoolExecutor'))
+            super(ProcessPoolExecutor, self).__init__(*args, **kwargs)
+
+    monkeypatch.setattr(lds_org, '_spawn_context', lambda: None)
+    monkeypatch.setattr(lds_org.futures, 'ProcessPoolExecutor',
+                        ProcessPoolExecutor)
+    rv = lds.get_units('unit-membership', range(3), transform=households,
+                       processes=2)
+    assert rv == [300] * 3
+    # the fetch threads were finished before forking workers
+    assert fetching == []